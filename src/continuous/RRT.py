@@ -6,29 +6,32 @@ as well as helper function to help compute the path
 
 """
 import numpy as np
-from shapely.geometry import LineString, Point, Polygon
+from math import hypot
+from shapely.geometry import Polygon
 from ..utils.KDTree import KDTree
+from ..utils.NearestNeighborIndex import NearestNeighborIndex
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
 
 def Steer(x_random, x_nearest, d_max): 
-    '''Moves towards x_random upto max distance d_max 
+    '''Moves towards x_random upto max distance d_max. Like IsCollision, a batch of M 
+    points can be steered in a single call by passing (M,2) arrays of points
 
     Args: 
-        x_random (numpy array): randomly positioned point within the "map" (x,y)
-        x_nearest (numpy array): the current nearest point in the RRT (x,y)
+        x_random (numpy array): randomly positioned point(s) within the "map" (x,y)
+        x_nearest (numpy array): the current nearest point(s) in the RRT (x,y)
         d_max (float): the "step" size from each node to node in RRT
     Returns: 
-        numpy array: A new point
+        numpy array: A new point, or an (M,2) array of new points
         
     '''
     
-    distance = np.linalg.norm(x_random - x_nearest)
-    if distance > d_max:
-        direction = (x_random - x_nearest)/distance
-        x_new = x_nearest + direction*d_max 
-    else: 
-        x_new = x_random; 
-    return x_new
+    x_nearest = np.asarray(x_nearest, dtype=float)
+    direction = np.asarray(x_random, dtype=float) - x_nearest
+    distance = np.sqrt(np.sum(direction**2, axis=-1, keepdims=True))
+    scale = np.minimum(1, np.divide(d_max, distance, out=np.ones_like(distance), 
+                                    where=distance > 0))
+    return x_nearest + direction*scale
 
 def CreatePolygon(obstacle): 
     '''Takes in a square obstacle and returns a shapely polygon object 
@@ -46,83 +49,186 @@ def CreatePolygon(obstacle):
     obs_polygon = Polygon([p1,p2,p3,p4])
     return obs_polygon
 
-def IsCollision(x_new, x_nearest, obstacles, eps): 
-    '''Checks whether a line segments connecting two points intersects an obstacle 
+def PrepareObstacles(obstacles, eps): 
+    '''Converts the obstacle definitions into the arrays consumed by IsCollision. This 
+    is done once per map so that no obstacle data is rebuilt on each collision check
 
     Args: 
-        x_new (list): the point that the tree wants to grow towards 
-        x_nearest (list): the start point on the tree
-        obstacles (list): square obstacle defined as [x_lower, y_lower, x_upper, y_upper]
-        eps (float): the factor to augment obstacles by (for safety)
+        obstacles (list): obstacles with a 'shape' ("rectangle" or "circle") and a 
+        'definition' ([x_lower, y_lower, x_upper, y_upper] or [cx, cy, r])
+        eps (float): the factor to augment rectangle obstacles by (for safety)
     Returns: 
-        Boolean: true if a collision is detected and false otherwise 
+        tuple: contiguous (N,2) lower and upper rectangle corners, (M,2) circle 
+        centres and (M,) squared circle radii
         
     '''
-    end = Point(x_new[0], x_new[1])
-    start = Point(x_nearest[0], x_nearest[1])
-    path = LineString([start, end])
-    for obstacle in obstacles:
-        if obstacle['shape'] == "rectangle":
-            obs_cur = np.array(obstacle['definition']) + np.array([-1,-1,1,1])*eps
-            obs_polygon = CreatePolygon(obs_cur)
-            # check if path intersects 
-            collision = path.intersects(obs_polygon)
-            if collision: 
-                return True
-        elif obstacle['shape'] == "circle":
-            cx,cy = obstacle['definition'][0],obstacle['definition'][1]
-            r = obstacle['definition'][2]
-            p = Point(cx,cy)
-            circle = p.buffer(3).boundary
-            # Check that the end point is not within the circle
-            if end.distance(p) < r:
-                return True
-            if start.distance(p) < r:
-                return True
-            # Use Shapely to do circle line segment intersection
-            collision = path.intersects(circle)
-            if collision:
-                return True
-    return False
-
-def GenRandomPoint(x_min = 0, x_max = 100, y_min = 0, y_max = 50):
-    '''Given the bounds of the environment, generates a random point
+    rects = np.array([o['definition'] for o in obstacles if o['shape'] == 'rectangle'],
+                     dtype=float).reshape(-1, 4)
+    circles = np.array([o['definition'] for o in obstacles if o['shape'] == 'circle'],
+                       dtype=float).reshape(-1, 3)
+    rect_lo = np.ascontiguousarray(rects[:, :2] - eps)
+    rect_hi = np.ascontiguousarray(rects[:, 2:] + eps)
+    circle_centers = np.ascontiguousarray(circles[:, :2])
+    circle_r2 = circles[:, 2]**2
+    return rect_lo, rect_hi, circle_centers, circle_r2
+
+def IsCollision(x_new, x_nearest, obstacles): 
+    '''Checks whether a line segments connecting two points intersects an obstacle 
+
+    The segment is tested against every obstacle at once: rectangles with a 
+    vectorized slab test and circles by projecting each centre onto the segment. 
+    Like a NumPy ufunc, a batch of M segments can be checked in a single call by 
+    passing (M,2) arrays of points.
 
     Args: 
-        x_min: the lower x bound of the map
-        x_max: the upper x bound of the map
-        y_min: the lower x bound of the map
-        y_max: the upper x bound of the map
+        x_new (list or numpy array): the point(s) that the tree wants to grow towards 
+        x_nearest (list or numpy array): the start point(s) on the tree
+        obstacles (tuple): the obstacle arrays produced by PrepareObstacles
     Returns: 
-        numpy array: a random point within the bounds of the map (x,y)
+        Boolean: true if a collision is detected and false otherwise, or an (M,) 
+        boolean numpy array when given a batch of segments
         
-        '''
-    x = np.random.uniform(x_min, x_max)
-    y = np.random.uniform(y_min, y_max)
-    return [x,y]
+    '''
+    lo, hi, centers, r2 = obstacles
+    single = np.ndim(x_new) == 1
+    # Segments along the first axis, obstacles along the second
+    p0 = np.atleast_2d(np.asarray(x_nearest, dtype=float))[:, None, :]
+    d = np.atleast_2d(np.asarray(x_new, dtype=float))[:, None, :] - p0
+
+    # Slab test: intersect the segment's parametric range [0,1] with the range 
+    # in which it lies between each rectangle's lower and upper bounds on each axis
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t1 = (lo - p0) / d
+        t2 = (hi - p0) / d
+    t_near = np.minimum(t1, t2)
+    t_far = np.maximum(t1, t2)
+    # A segment parallel to an axis is either always or never within that slab
+    parallel = d == 0
+    inside = (p0 >= lo) & (p0 <= hi)
+    t_near = np.where(parallel, np.where(inside, -np.inf, np.inf), t_near)
+    t_far = np.where(parallel, np.where(inside, np.inf, -np.inf), t_far)
+    t_min = np.maximum(t_near.max(axis=2), 0.0)
+    t_max = np.minimum(t_far.min(axis=2), 1.0)
+    collision = np.any(t_min <= t_max, axis=1)
+
+    # Closest point on each segment to each circle centre
+    length2 = np.sum(d*d, axis=2)
+    proj = np.sum((centers - p0)*d, axis=2)
+    t = np.divide(proj, length2, out=np.zeros_like(proj), where=length2 > 0)
+    closest = p0 + np.clip(t, 0.0, 1.0)[:, :, None]*d
+    dist2 = np.sum((centers - closest)**2, axis=2)
+    collision |= np.any(dist2 <= r2, axis=1)
+
+    if single:
+        return bool(collision[0])
+    return collision
 
 class RRT:
     '''RRT is an object that stores a 'payload' (specifying start node, goal node, 
     obstacles) and then applies the RRT algorithm to produce a kdtree with the 
-    explored nodes and their parents.
+    explored nodes and their parents. The explored nodes are stored as rows of 
+    (x, y, parentIndex) in a numpy array, and the kdtree and payload list are only 
+    built from it when they are asked for.
 
     Args: 
         payload (dictionary): contains the 'start', 'goal', 'goalRadius', 'obstacles', 
-        'dmax' (distance between nodes), 'width' and 'height' (of environment)
+        'dmax' (distance between nodes), 'width' and 'height' (of environment) and 
+        optionally a 'seed' (an integer or numpy Generator) for the random points
     Return:
         An instance of the RRT class
 
     '''
     def __init__(self, payload):
+        obstacles = payload['obstacles']
+        eps = 5 # safety margin around obstacle
+        # Build the obstacle arrays once and reuse them for every collision check
+        self._obstacles = PrepareObstacles(obstacles, eps)
+        # Random points are generated in large batches and handed out from a buffer
+        # Without a seed, the generator is seeded from numpy's global random state so 
+        # that np.random.seed still makes runs repeatable
+        seed = payload.get('seed')
+        if seed is None:
+            seed = np.random.randint(2**32, dtype=np.uint64)
+        self._rng = np.random.default_rng(seed)
+        self._rand_bounds = (payload['width'], payload['height'])
+        self._rand_buf = np.empty((0, 2))
+        self._rand_i = 0
+        # the explored points as rows of (x, y, parentIndex), grown geometrically
+        self._pts = np.empty((1024, 3))
+        self._size = 0
+        self._tree = None
+        self._pts_list = None
         # run RRT algorithm
-        kdtree, x_last = self.RunRRT(payload)
-        self.RRTTree = kdtree
-        self.RRTPts = kdtree.GetTreeAsList()
+        self._target_index = self.RunRRT(payload)
         self.obstacles = payload['obstacles']
-        self.Target_Node = x_last
         self.goal = payload['goal']
         self.goal_radius = payload['goalRadius']
 
+    @property
+    def RRTTree(self):
+        '''KDTree: a KDTree with the explored points, built on first access'''
+        if self._tree is None:
+            pts = self._pts[:self._size]
+            kdtree = KDTree(pts[0, :2])
+            for x, y, parent_index in pts[1:]:
+                kdtree.Insert((x, y), kdtree.Nodes[int(parent_index)])
+            self._tree = kdtree
+        return self._tree
+
+    @property
+    def RRTPts(self):
+        '''List: the explored points as dictionaries of 'x', 'y' and 'parentIndex', 
+        built on first access'''
+        if self._pts_list is None:
+            self._pts_list = [{"x": x, "y": y, "parentIndex": int(parent_index)}
+                              for x, y, parent_index in self._pts[:self._size].tolist()]
+        return self._pts_list
+
+    @property
+    def Target_Node(self):
+        '''KDTreeNode: the last point explored, which is within the goal area'''
+        return self.RRTTree.Nodes[self._target_index]
+
+    def __AddPoint(self, point, parent_index):
+        '''Adds an explored point to the tree, doubling the point array when it is full
+
+        Args:
+            self (RRT): an RRT Object
+            point (numpy array): the explored point (x,y)
+            parent_index (integer): the index of the point's parent, -1 for the start
+ 
+        Returns:
+            integer: the index of the added point
+
+        '''
+        if self._size == len(self._pts):
+            pts = np.empty((2*len(self._pts), 3))
+            pts[:self._size] = self._pts[:self._size]
+            self._pts = pts
+        self._pts[self._size] = (point[0], point[1], parent_index)
+        self._size += 1
+        return self._size - 1
+
+    def GenRandomPoints(self, count):
+        '''Returns random points within the bounds of the environment. They are taken 
+        from a buffer of pre-generated points, which is refilled when it runs out  
+
+        Args:
+            self (RRT): an RRT Object
+            count (integer): the number of points to return
+ 
+        Returns:
+            numpy array: (count,2) random points within the bounds of the map (x,y)
+
+        '''
+        if self._rand_i + count > len(self._rand_buf):
+            size = max(8192, count)
+            self._rand_buf = self._rng.uniform((0, 0), self._rand_bounds, size=(size, 2))
+            self._rand_i = 0
+        points = self._rand_buf[self._rand_i:self._rand_i + count]
+        self._rand_i += count
+        return points
+
     def RunRRT(self, payload): 
         '''Runs the RRT algorithm given a payload containing the map, start and goal
         nodes and step size  
@@ -133,39 +239,41 @@ class RRT:
             'dmax' (distance between nodes), 'width' and 'height' (of environment)
  
         Returns:
-            KDTree: a KDTree object with nodes corresponding to the points explored 
-            List: x_last - the last point explored on the RRT, indicating where the 
-            search terminated allowing the path to be backtracked. 
+            integer: the index of the last point explored on the RRT, indicating where 
+            the search terminated allowing the path to be backtracked. 
 
         '''
-        start = np.array(payload['start'])
-        goal = np.array(payload['goal'])
+        start = payload['start']
+        goal = payload['goal']
         goal_radius =  payload['goalRadius']
-        obstacles = payload['obstacles']
         d_max = payload['d_max']
-        width =  payload['width']
-        height = payload['height']
-        kdtree = KDTree(start)
-        start = np.array(start) 
-        goal = np.array(goal)
-        dist_to_goal = np.linalg.norm(start - goal)
-        eps = 5 # safety margin around obstacle
+        batch_size = 16 # number of random points sampled per iteration
+        last = self.__AddPoint(start, -1)
+        # nearest neighbor queries go to a cKDTree backed index, whose point indices 
+        # match the order in which points are added to the tree
+        nn_index = NearestNeighborIndex(start)
+        dist_to_goal = hypot(start[0] - goal[0], start[1] - goal[1])
         # Continue searching for points until arrival at goal area
         while dist_to_goal > goal_radius: 
-            # generate a random point 
-            x_rand = GenRandomPoint(0, width, 0, height)
-            # get nearest point in graph from x_rand
-            node_nearest = kdtree.NearestNeighbor(x_rand)
-            x_nearest = node_nearest.p
-            # generate x_new based on random point using steer
-            x_new = Steer(x_rand,x_nearest,d_max)
-            # check if path to x_new collides with obstacle
-            collision = IsCollision(x_new, x_nearest, obstacles, eps)
-            # if no collision add it to tree 
-            if not collision: 
-                x_last = kdtree.Insert(x_new)
-                dist_to_goal = np.linalg.norm(x_new - goal)
-        return kdtree, x_last
+            # generate a batch of random points 
+            x_rand = self.GenRandomPoints(batch_size)
+            # get nearest point in graph from each x_rand
+            nearest = nn_index.NearestNeighbors(x_rand)
+            x_nearest = nn_index.points[nearest]
+            # generate each x_new by steering towards its random point
+            x_new = Steer(x_rand, x_nearest, d_max)
+            # check which paths to x_new collide with an obstacle
+            collision = IsCollision(x_new, x_nearest, self._obstacles)
+            # add the first collision free point to the tree. Since the samples are 
+            # independent, it is distributed like a single collision free sample
+            free = np.flatnonzero(~collision)
+            if len(free) > 0: 
+                k = free[0]
+                last = self.__AddPoint(x_new[k], nearest[k])
+                nn_index.Insert(x_new[k])
+                x, y = x_new[k]
+                dist_to_goal = hypot(x - goal[0], y - goal[1])
+        return last
     
     def PlotRRT(self):
         '''Displays a plot of the RRT path which is useful for visualization and  
@@ -180,22 +288,17 @@ class RRT:
         '''
         fig, ax = plt.subplots()
         ax.set_aspect('equal')
-        pts = self.RRTPts
-        for pt in pts[1:]:
-            plt.scatter(pt["x"], pt["y"], c="blue", s=1)
-            xParent, yParent = pts[pt["parentIndex"]]["x"],pts[pt["parentIndex"]]["y"]
-            # print("({},{})".format(xParent,yParent))
-            x = [pt["x"], xParent]
-            y = [pt["y"], yParent]
-            plt.plot(x,y, c="green")
-        goalpt = self.RRTPts[self.Target_Node.index]
-        cur_pt = goalpt
-        while cur_pt["parentIndex"] != -1:
-            xParent, yParent = self.RRTPts[cur_pt["parentIndex"]]["x"],self.RRTPts[cur_pt["parentIndex"]]["y"]
-            x = [cur_pt["x"], xParent]
-            y = [cur_pt["y"], yParent]
-            plt.plot(x,y, c="blue")
-            cur_pt = self.RRTPts[cur_pt["parentIndex"]]
+        pts = self._pts[:self._size]
+        # draw every edge from a point to its parent as one collection
+        parent_index = pts[1:, 2].astype(int)
+        segs = np.stack([pts[1:, :2], pts[parent_index, :2]], axis=1)
+        ax.add_collection(LineCollection(segs, colors="green"))
+        ax.scatter(pts[1:, 0], pts[1:, 1], c="blue", s=1)
+        # draw the path from the goal back to the start as a single line
+        path = [self._target_index]
+        while pts[path[-1], 2] != -1:
+            path.append(int(pts[path[-1], 2]))
+        ax.plot(pts[path, 0], pts[path, 1], c="blue")
             
         for obstacle in self.obstacles: 
             if obstacle['shape'] == 'rectangle':
@@ -228,7 +331,7 @@ class RRT:
         payload['goalRadius'] = self.goal_radius
         payload['obstacles'] = self.obstacles
         payload['points'] = self.RRTPts
-        payload['targetNodeIndex'] = self.Target_Node.index
+        payload['targetNodeIndex'] = self._target_index
         return payload
 
 
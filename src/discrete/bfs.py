@@ -1,62 +1,6 @@
 import numpy as np
 from shapely.geometry import LineString, Point, Polygon
-
-class Node: 
-    '''Class representing a point in the BFS grid
-
-    Args: 
-        x (int): x coordinate of grid point 
-        y (int): y coordinate of grid point
-        parent (list[int, int]): [x,y] point of parent node
-    Returns: 
-        Node: An instance of the Node class 
-    '''
-    def __init__(self, x, y, parent):
-        self.x = x
-        self.y = y
-        self.parent = parent # coordinates of parent node or -1 if start, -2 if goal
-
-def in_window(x, y, window_width, window_height):
-    '''Checks if a point, (x,y), is in the defined window
-
-    Args: 
-        x (int): x coordinate of point
-        y (int): y coordinate of point
-        window_width (int): window's size in the x direction
-        window_height (int): window's size in the y direction
-    Returns: 
-        bool: bool variable showing if the point (x,y) is in the window
-    '''
-    if x < 0 or y < 0 or x >= window_width or y >= window_height:
-        return False
-    return True
-
-def get_neighbours(node, parents): 
-    '''Get neighbouring Nodes for a N,E,S,W grid
-
-    Args: 
-        node (Node): input Node 
-        parents (numpy array): ndarray showing parents of points in bfs grid
-    '''
-    positions = [[-1,0], [1, 0], [0, -1], [0, 1]] # N E S W grid 
-    
-    x = node.x
-    y = node.y 
-    
-    neighbours = []
-
-    for pos in positions: 
-        # Check in bounds 
-        if not in_window(x+pos[0], y+pos[1], parents.shape[0], parents.shape[1]):
-            continue
-
-        if parents[x+pos[0], y+pos[1]] != None: 
-            continue
-
-        node = Node(x+pos[0], y+pos[1], [x,y])
-        neighbours.append(node)
-
-    return neighbours
+from .bfs_nb import search
 
 def mark_points_in_Circle(grid, cx, cy, r):
     '''Marks points contained within a Circle on a bfs grid as True
@@ -70,16 +14,14 @@ def mark_points_in_Circle(grid, cx, cy, r):
         grid (numpy array): updated grid 
     '''
     
-    for i in range(cx - r - 1, cx + r + 2):
-        for j in range(cy - r - 1 , cy + r + 2):
-
-            # Check in bounds 
-            if not in_window(i, j, grid.shape[0], grid.shape[1]):
-                continue
-
-            if (((i-cx)**2 + (j-cy)**2) <= r**2):
-                grid[i,j] = True
+    # Bounding box of the circle, clipped to the grid
+    x0, x1 = max(cx - r - 1, 0), min(cx + r + 1, grid.shape[0] - 1)
+    y0, y1 = max(cy - r - 1, 0), min(cy + r + 1, grid.shape[1] - 1)
+    if x0 > x1 or y0 > y1:
+        return grid
 
+    xs, ys = np.ogrid[x0:x1 + 1, y0:y1 + 1]
+    grid[x0:x1 + 1, y0:y1 + 1] |= (xs - cx)**2 + (ys - cy)**2 <= r**2
 
     return grid
 
@@ -96,14 +38,13 @@ def mark_points_in_Rectangle(grid, rx1, ry1, rx2, ry2):
         grid (numpy array): updated grid 
     '''
     
-    for i in range(rx1, rx2 + 1): 
-        for j in range(ry1, ry2 + 1):
+    # Clip the rectangle to the grid
+    x0, x1 = max(rx1, 0), min(rx2, grid.shape[0] - 1)
+    y0, y1 = max(ry1, 0), min(ry2, grid.shape[1] - 1)
+    if x0 > x1 or y0 > y1:
+        return grid
 
-            # Check in bounds 
-            if not in_window(i, j, grid.shape[0], grid.shape[1]):
-                continue
-            
-            grid[i,j] = True
+    grid[x0:x1 + 1, y0:y1 + 1] = True
     
     return grid
 
@@ -113,43 +54,27 @@ def get_path_from_goal(gx, gy, parent_grid):
     Args: 
         gx (int): x coordiante of goal point 
         gy (int): y coordiante of goal point 
-        parent_grid (numpy array): grid showing parents of each point
+        parent_grid (numpy array): grid showing the flat index (x*height + y) of the 
+        parent of each point, -2 for the start point
     Returns: 
         path (list[list]): List of coordinates along path from goal to start
     '''
     path = []
+    height = parent_grid.shape[1]
     parent = parent_grid[gx, gy]
 
     path.append([gx,gy])
 
     while True:
-        if parent == [-1]:
+        if parent == -2:
             break 
-        path.append(parent)
+        px, py = divmod(int(parent), height)
+        path.append([px, py])
 
-        parent = parent_grid[parent[0], parent[1]]
+        parent = parent_grid[px, py]
 
     return path
 
-    # Make format match rrt 
-
-    # Use list of dictionaries 
-    ret_path = []
-
-    for pt in path: 
-        parent = parent_grid[pt[0], pt[1]]
-
-        if parent == [-1]: 
-            index = -1
-        else: 
-            index = path.index(parent)
-
-        point = {'x': pt[0], 'y': pt[1], 'parentIndex': index}
-        ret_path.append(point)
-
-
-    return ret_path
-
 class BFS:
     '''Class representing a BFS path-finding algorithm 
     
@@ -173,15 +98,15 @@ class BFS:
         obstacles = payload['obstacles']
 
         # Define Grid as np arrays 
-        visited_grid = np.zeros((grid_width, grid_height), dtype=bool)
         blocked_grid = np.zeros((grid_width, grid_height), dtype=bool)
         goal_grid = np.zeros((grid_width, grid_height), dtype=bool)
-        parent_grid = np.empty((grid_width, grid_height), dtype=object)
+        # Parents are stored as the flat index x*grid_height + y, -1 marks no parent
+        parent_grid = np.full((grid_width, grid_height), -1, dtype=np.int32)
 
 
         # Mark start position
         start = [int(start[0]/step_size), int(start[1]/step_size)]
-        parent_grid[start[0], start[1]] = [-1]
+        parent_grid[start[0], start[1]] = -2
 
         # Mark goal points 
         goal_grid = mark_points_in_Circle(  goal_grid, 
@@ -205,52 +130,16 @@ class BFS:
                 blocked_grid = mark_points_in_Circle(blocked_grid, int(cx), int(cy), int(r))
         
 
-        start_node = Node(int(start[0]), int(start[1]), -1)
-
-        nodes = []
-        nodes.append(start_node)
-        visited_order = []
-
         self.blocked_grid = blocked_grid
         self.goal_grid = goal_grid
 
-        path_found = False
-        
-        while len(nodes) != 0 and not path_found: 
-
-            node = nodes.pop(0)
-
-            # If visited, continue
-            if visited_grid[node.x, node.y] == True: continue
-
-            # Get neighbours    
-            neighbours = get_neighbours(node, parent_grid)
-
-            # Mark visited and add to visited list 
-            visited_grid[node.x, node.y] = True
-            visited_order.append([node.x, node.y])
-
-            # Check if goal 
-            if goal_grid[node.x, node.y]:
-                path = get_path_from_goal(node.x, node.y, parent_grid)
-                self.path = path
-                path_found = True
-
-            # For each neighbour 
-            for neighbour in neighbours:
-                
-                nx = neighbour.x
-                ny = neighbour.y
-
-                # Check if visited or blocked
-                if blocked_grid[nx, ny] or visited_grid[nx, ny]: 
-                    continue
+        gx, gy, visited = search(blocked_grid, goal_grid, parent_grid, start[0], start[1])
+        if gx != -1:
+            self.path = get_path_from_goal(int(gx), int(gy), parent_grid)
 
-                # Mark parent 
-                parent_grid[nx, ny] = neighbour.parent
-                    
-                # Add to queue 
-                nodes.append(neighbour)
+        visited_x, visited_y = np.divmod(visited, grid_height)
+        visited_order = np.stack((visited_x, visited_y), axis=1).tolist()
+        visited_index = {(x, y): i for i, (x, y) in enumerate(visited_order)} # (x,y) -> position in visited_order
 
         # Put data into desired format for the front end 
         points_list = []
@@ -258,10 +147,10 @@ class BFS:
         for pt in visited_order: 
             parent = parent_grid[pt[0], pt[1]]
 
-            if parent == [-1]: 
+            if parent == -2: 
                 index = -1
             else: 
-                index = visited_order.index(parent)
+                index = visited_index.get(divmod(int(parent), grid_height), -1)
 
             point = {'x': pt[0]*step_size, 'y': pt[1]*step_size, 'parentIndex': index}
             points_list.append(point)
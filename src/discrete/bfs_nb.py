@@ -0,0 +1,60 @@
+"""
+Numba compiled core loop of the BFS path-finding algorithm. Grid cells are
+identified by their flat index x*height + y, which is also how parents are stored
+in the parent grid.
+
+"""
+
+import numpy as np
+from numba import njit
+
+
+@njit(cache=True)
+def search(blocked_grid, goal_grid, parent_grid, start_x, start_y):
+    ''' Runs a N,E,S,W grid BFS from the start point until a goal point is visited,
+    writing the flat index of each reached point's parent into parent_grid
+
+    Args:
+        blocked_grid (numpy array): bool grid of the points inside obstacles
+        goal_grid (numpy array): bool grid of the goal points
+        parent_grid (numpy array): int32 grid of parents, -1 for unreached points and
+        -2 for the start point
+        start_x (int): x coordinate of the start point
+        start_y (int): y coordinate of the start point
+    Returns:
+        tuple: the (x, y) of the goal point reached, (-1, -1) if there is none, and
+        the flat indices of the visited points in the order they were visited
+    '''
+    width, height = blocked_grid.shape
+    dx = np.array((-1, 1, 0, 0))
+    dy = np.array((0, 0, -1, 1))
+
+    # Every point is queued at most once, so the queue never wraps around and
+    # queue[:head] is the order in which points were visited
+    queue = np.empty(width*height, dtype=np.int32)
+    queue[0] = start_x*height + start_y
+    head = 0
+    tail = 1
+    while head < tail:
+        cell = queue[head]
+        head += 1
+        x = cell // height
+        y = cell % height
+
+        # Check if goal
+        if goal_grid[x, y]:
+            return x, y, queue[:head]
+
+        for k in range(4):
+            nx = x + dx[k]
+            ny = y + dy[k]
+            # Check in bounds, then if blocked or already reached
+            if nx < 0 or ny < 0 or nx >= width or ny >= height:
+                continue
+            if blocked_grid[nx, ny] or parent_grid[nx, ny] != -1:
+                continue
+            parent_grid[nx, ny] = cell
+            queue[tail] = nx*height + ny
+            tail += 1
+
+    return -1, -1, queue[:head]
@@ -1,17 +1,22 @@
 """
 This class implements the KDTree data-structure which is an efficient organization
-of points in a k-dimensional space, where each level of the tree is split into 
-a hyperplane that divides the points into two partitions. 
+of points in a 2-dimensional space, where each level of the tree is split into 
+a line that divides the points into two partitions, alternating between the x and 
+y axis. 
 
 Allows functionality to insert points into the tree, return the points in order, 
-and returns the nearest neighbor of a point given another point. 
+and returns the nearest neighbor of a point given another point. The tree is also 
+kept in a Structure-of-Arrays layout so the nearest neighbor search can run as 
+compiled code (see kdtree_nb).
 
 """
 
 from .KDTreeNode import KDTreeNode
+from .kdtree_nb import nn
 from typing import List, Text
 from pprint import pprint
 
+import numpy as np
 import matplotlib.pyplot as plt
 
 class KDTree:
@@ -26,14 +31,50 @@ class KDTree:
     def __init__(self, point=(0, 0)):
         self.root = KDTreeNode(point, 0)
         self.TreeList = [self.root.node_to_dict()]
+        # The nodes in the order they were inserted (matching TreeList), and the 
+        # same tree as arrays indexed by insertion order for the compiled search
+        self.Nodes = [self.root]
+        self.xs = np.empty(64)
+        self.ys = np.empty(64)
+        self.left = np.full(64, -1, dtype=np.int32)
+        self.right = np.full(64, -1, dtype=np.int32)
+        self.axis = np.zeros(64, dtype=np.int32)
+        self.depth = 0
+        self.__AddToArrays(self.root)
+
+    def __AddToArrays(self, node: KDTreeNode):
+        '''Writes a node into the array representation of the tree, doubling the 
+        size of the arrays when they are full
 
-    def Insert(self, point):
+        Args: 
+            self (KDTree): a KDTree object
+            node (KDTreeNode): the node to add, whose index is its insertion order
+        
+        Return:
+            None
+
+        '''
+        i = node.index
+        if i == len(self.xs):
+            self.xs = np.concatenate((self.xs, np.empty(i)))
+            self.ys = np.concatenate((self.ys, np.empty(i)))
+            self.left = np.concatenate((self.left, np.full(i, -1, dtype=np.int32)))
+            self.right = np.concatenate((self.right, np.full(i, -1, dtype=np.int32)))
+            self.axis = np.concatenate((self.axis, np.zeros(i, dtype=np.int32)))
+        self.xs[i] = node.x
+        self.ys[i] = node.y
+        self.axis[i] = node.axis
+        self.depth = max(self.depth, node.depth)
+
+    def Insert(self, point, parent=None):
         '''Inserts a new KDTreeNode into the KDTree thru an iterative approach
         returns the node that was created
 
         Args: 
             self (KDTree): a KDTree object
-            point (np.ndarray): the (k-dimensional) point to be inserted into the KDTree
+            point (np.ndarray): the (x,y) point to be inserted into the KDTree
+            parent (KDTreeNode): the node closest to point, if the caller already knows 
+            it. Otherwise it is found with a nearest neighbor search
         
         Return:
             KDTreeNode: a KDTree node of the new point inserted
@@ -42,9 +83,12 @@ class KDTree:
         depth = 0
         current_node = self.root
         new_node = KDTreeNode(point, depth)
-        new_node.parent = self.NearestNeighbor(point)
+        if parent is None:
+            parent = self.NearestNeighbor(point)
+        new_node.parent = parent
         new_node.index = len(self.TreeList)
         self.TreeList.append(new_node.node_to_dict())
+        self.Nodes.append(new_node)
         while True:
             # Case where new node is greater, go to the right
             if current_node < new_node:
@@ -55,6 +99,8 @@ class KDTree:
                 else:
                     new_node.set_depth(depth + 1)
                     current_node.right = new_node
+                    self.__AddToArrays(new_node)
+                    self.right[current_node.index] = new_node.index
                     break
             # Case where new node is smaller, go to the left
             else:
@@ -63,6 +109,8 @@ class KDTree:
                 else:
                     new_node.set_depth(depth + 1)
                     current_node.left = new_node
+                    self.__AddToArrays(new_node)
+                    self.left[current_node.index] = new_node.index
                     break
             depth = depth + 1
             new_node.set_depth(depth)
@@ -106,73 +154,6 @@ class KDTree:
         self.__GetPointsInOrderTraversal(self.root, nodes)
         return nodes
 
-    def CloserKDTreeNode(self, target, p1: KDTreeNode, p2: KDTreeNode):
-        ''' Takes in target and returns the tree node closer to the point
-        
-        Args:
-            self (KDTree): a KDTree object
-            target (np.ndarray): a k-dimensional point
-            p1 (KDTreeNode): a tree node
-            p2 (KDtreeNode): another tree node
-
-        Returns: 
-            KDTreeNode: the tree node (p1 or p2) that is closest to the target
-        
-        '''
-        if p1 is None:
-            return p2
-        if p2 is None:
-            return p1
-
-        d1 = p1.distance_to_point(target)
-        d2 = p2.distance_to_point(target)
-
-        if d1 < d2:
-            return p1
-        else:
-            return p2
-
-    def __NearestNeighbor(self, root: KDTreeNode, point):
-        ''' Returns the KDTree node that is closest to a given point (private method
-        for recursion)
-        
-        Args:
-            self (KDTree): a KDTree object
-            root (KDTreeNode): the root of the KDTree
-            point (np.ndarray): the point that is being queried
-
-        Returns: 
-            KDTreeNode: the tree node in the KDTree that is closest to the target
-        
-        '''
-
-        if root is None:
-            return None
-
-        next_branch = None
-        opposite_branch = None
-
-        if root.compare_to_point(point) > 0:
-            next_branch = root.left
-            opposite_branch = root.right
-        else:
-            next_branch = root.right
-            opposite_branch = root.left
-
-        # Figure out what node is closest to our search point.
-        # Compares the best result from the new branch to the current node we
-        # are at
-        best: KDTreeNode = self.CloserKDTreeNode(
-            point, self.__NearestNeighbor(next_branch, point), root)
-        # If the splitting plane is closer than the current best, search the other
-        # branch in case it contains a closer node
-        if best.distance_to_point(point) > root.distance_to_splitting_plane(
-                point):
-            best = self.CloserKDTreeNode(
-                point, self.__NearestNeighbor(opposite_branch, point), best)
-
-        return best
-
     def NearestNeighbor(self, point):
         ''' Returns the KDTree node that is closest to a given point (public method)
         
@@ -184,7 +165,9 @@ class KDTree:
             KDTreeNode: the tree node in the KDTree that is closest to the target
         
         '''
-        return self.__NearestNeighbor(self.root, point)
+        index = nn(self.xs, self.ys, self.left, self.right, self.axis, self.root.index,
+                   float(point[0]), float(point[1]), self.depth)
+        return self.Nodes[index]
 
     def GetTreeAsList(self):
         ''' Returns the KDTree as a list
@@ -8,6 +8,7 @@ the splitting hyperplane, comparisons (and operators) between nodes.
 """
 
 import numpy as np
+from math import sqrt
 
 
 class KDTreeNode:
@@ -22,10 +23,14 @@ class KDTreeNode:
     '''
     def __init__(self, point=np.array((0, 0)), depth=0):
         self.p = np.array(point)
+        # The coordinates are also kept as python floats, as numpy calls on tiny 
+        # arrays are far slower than plain arithmetic
+        self.x, self.y = float(point[0]), float(point[1])
         self.depth = depth
 
-        # The dimension of the splitting plane (i.e. 0 -> the x dimension, 1-> y )
-        self.axis = depth % len(point)
+        # The dimension of the splitting plane (i.e. 0 -> the x dimension, 1-> y ).
+        # Points are 2D, so the axis simply alternates with the depth
+        self.axis = depth & 1
 
         # The children nodes
         self.left = None
@@ -50,7 +55,7 @@ class KDTreeNode:
 
         '''
         self.depth = depth
-        self.axis = depth % len(self.p)
+        self.axis = depth & 1
 
     def distance_to_node(self, other):
         '''Returns the distance between the current node and the input node 
@@ -64,7 +69,7 @@ class KDTreeNode:
 
         '''
 
-        return np.linalg.norm(self.p - other.p)
+        return sqrt(self.distance2_to_point((other.x, other.y)))
     
     def distance_to_point(self, other):
         '''Returns the distance between the current node and the input node 
@@ -78,7 +83,24 @@ class KDTreeNode:
 
         '''
         
-        return np.linalg.norm(self.p - other)
+        return sqrt(self.distance2_to_point(other))
+
+    def distance2_to_point(self, other):
+        '''Returns the squared distance between the current node and the input point. 
+        This avoids the square root and is enough to compare distances
+
+        Args: 
+            self (KDTreeNode): a KDTreeNode object
+            other (np.ndarray): the point we want to find the squared distance to
+            
+        Return:
+            float: the squared euclidean distance between the node and the point 
+
+        '''
+
+        dx = self.x - other[0]
+        dy = self.y - other[1]
+        return dx*dx + dy*dy
 
     def distance_to_splitting_plane(self, other):
         '''Returns the distance between the current node's splitting axis 
@@ -94,8 +116,7 @@ class KDTreeNode:
 
         '''
 
-        axis = self.axis
-        return abs(self.p[axis] - other[axis])
+        return abs(self.compare_to_point(other))
 
     def compare_to_point(self, point):
         ''' Computes the difference between the point's value on the splitting axis 
@@ -110,8 +131,9 @@ class KDTreeNode:
 
         '''
 
-        axis = self.axis
-        return self.p[axis] - point[axis]
+        if self.axis == 0:
+            return self.x - point[0]
+        return self.y - point[1]
 
     def node_to_dict(self):
         ''' Returns a dictionary representation of a KDTree Node object 
@@ -129,8 +151,8 @@ class KDTreeNode:
         if self.parent is not None:
             parentIndex = self.parent.index
         return {
-            "x":self.p[0],
-            "y":self.p[1],
+            "x":self.x,
+            "y":self.y,
             "parentIndex": parentIndex}
 
     def __lt__(self, other):
@@ -147,9 +169,9 @@ class KDTreeNode:
 
         '''
 
-        axis = other.axis
-        p = self.p
-        return p[axis] <= other.p[axis]
+        if other.axis == 0:
+            return self.x <= other.x
+        return self.y <= other.y
 
     def __gt__(self, other):
         ''' Operator overload for the > (greater than). Compares the current node and 
@@ -165,14 +187,13 @@ class KDTreeNode:
 
         '''
 
-        axis = self.axis
-        p = self.p
-        return p[axis] > other.p[axis]
+        if self.axis == 0:
+            return self.x > other.x
+        return self.y > other.y
     
     def __eq__(self, other):
-        ''' Operator overload for the = (equal to). Compares the current node and 
-        another node's values at the dimension of the other node (i.e. if the 
-        other node is at dimension 0, compare the x values) 
+        ''' Operator overload for the = (equal to). Two nodes are equal when they 
+        are at the same position 
 
         Args: 
             self (KDTreeNode): a KDTreeNode object
@@ -183,7 +204,21 @@ class KDTreeNode:
 
         '''
 
-        return self.p == other.p
+        return isinstance(other, KDTreeNode) and self.x == other.x and self.y == other.y
+
+    def __hash__(self):
+        ''' Hashes the node by its position, consistent with __eq__, so nodes can be 
+        used in sets and as dictionary keys
+
+        Args: 
+            self (KDTreeNode): a KDTreeNode object
+            
+        Return:
+            integer: the hash of the node's (x, y) position
+
+        '''
+
+        return hash((self.x, self.y))
 
     def __repr__(self):
         ''' A method to represent the KDTreeNode object as a string when print() is 
@@ -0,0 +1,118 @@
+"""
+This class implements a nearest neighbor index over a growing set of 2D points.
+Queries are answered by scipy's cKDTree (a C implementation of a KDTree). Rather than
+rebuilding a single cKDTree as points are added, the index uses the "logarithmic
+method": points are kept in static cKDTrees of size leaf_size * 2^i that are merged
+like a binary counter, so each point takes part in O(log N) rebuilds. Points that
+do not yet fill a leaf are searched by brute force, which is cheap as there are few
+of them.
+
+Points are identified by their insertion index, so the index can be kept alongside
+any other list of nodes (e.g. the nodes of a KDTree).
+
+"""
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+class NearestNeighborIndex:
+    '''
+    Args:
+        point (np.ndarray): the first point in the index (x,y)
+        leaf_size (integer): the number of pending points that are searched by brute
+        force before they are moved into a cKDTree
+
+    Return:
+        An instance of the NearestNeighborIndex class
+
+    '''
+    def __init__(self, point=(0, 0), leaf_size=32):
+        self.leaf_size = leaf_size
+        # Points are stored contiguously and the buffer is grown geometrically
+        self.points = np.empty((64, 2))
+        self.size = 0
+        # buckets[i] is None or (offset, cKDTree) over leaf_size * 2^i points starting
+        # at offset. The buckets cover the first tree_size points, the rest are pending
+        self.buckets = []
+        self.tree_size = 0
+        self.Insert(point)
+
+    def Insert(self, point):
+        '''Adds a point to the index. Once a leaf worth of points is pending, it is
+        merged with every full bucket below the first empty one into a new cKDTree
+
+        Args:
+            self (NearestNeighborIndex): a NearestNeighborIndex object
+            point (np.ndarray): the point to be inserted (x,y)
+
+        Return:
+            integer: the index of the inserted point
+
+        '''
+        if self.size == len(self.points):
+            points = np.empty((2*len(self.points), 2))
+            points[:self.size] = self.points[:self.size]
+            self.points = points
+        self.points[self.size] = point
+        self.size += 1
+        if self.size - self.tree_size >= self.leaf_size:
+            # Carry like a binary counter. Newer points live in lower buckets, so the
+            # merged points are a contiguous range starting at the oldest offset
+            offset = self.tree_size
+            level = 0
+            while level < len(self.buckets) and self.buckets[level] is not None:
+                offset = self.buckets[level][0]
+                self.buckets[level] = None
+                level += 1
+            if level == len(self.buckets):
+                self.buckets.append(None)
+            self.buckets[level] = (offset, cKDTree(self.points[offset:self.size]))
+            self.tree_size = self.size
+        return self.size - 1
+
+    def NearestNeighbor(self, point):
+        ''' Returns the index of the point that is closest to a given point
+
+        Args:
+            self (NearestNeighborIndex): a NearestNeighborIndex object
+            point (np.ndarray): the point that is being queried
+
+        Returns:
+            integer: the index of the closest point in the order it was inserted
+
+        '''
+        return int(self.NearestNeighbors(np.reshape(point, (1, 2)))[0])
+
+    def NearestNeighbors(self, points):
+        ''' Returns the index of the closest point for each point in a batch, making
+        one cKDTree query per bucket for the whole batch
+
+        Args:
+            self (NearestNeighborIndex): a NearestNeighborIndex object
+            points (np.ndarray): (M,2) array of the points that are being queried
+
+        Returns:
+            np.ndarray: (M,) indices of the closest points in the order they were
+            inserted
+
+        '''
+        points = np.asarray(points, dtype=float)
+        best = np.full(len(points), -1)
+        best_dist2 = np.full(len(points), np.inf)
+        for bucket in self.buckets:
+            if bucket is None:
+                continue
+            offset, ckdtree = bucket
+            dist, i = ckdtree.query(points)
+            closer = dist*dist < best_dist2
+            best[closer] = offset + i[closer]
+            best_dist2[closer] = dist[closer]**2
+        pending = self.points[self.tree_size:self.size]
+        if len(pending) > 0:
+            dist2 = np.sum((points[:, None, :] - pending)**2, axis=2)
+            i = np.argmin(dist2, axis=1)
+            dist2 = dist2[np.arange(len(points)), i]
+            closer = dist2 < best_dist2
+            best[closer] = self.tree_size + i[closer]
+        return best
@@ -0,0 +1,68 @@
+"""
+Numba compiled nearest neighbor search for the KDTree class. The tree is passed in
+a Structure-of-Arrays layout, where node i is described by xs[i], ys[i], its
+children left[i] and right[i] (-1 when missing) and its splitting axis axis[i].
+
+"""
+
+import numpy as np
+from numba import njit
+
+
+@njit(cache=True)
+def nn(xs, ys, left, right, axis, root, qx, qy, depth):
+    ''' Returns the index of the node closest to the point (qx, qy). The search
+    walks down to a leaf, pushing the branches it skips onto a stack with the squared
+    distance to their splitting plane, and only explores a skipped branch if that
+    plane is closer than the current best
+
+    Args:
+        xs (np.ndarray): x coordinate of each node
+        ys (np.ndarray): y coordinate of each node
+        left (np.ndarray): index of the left child of each node, -1 if there is none
+        right (np.ndarray): index of the right child of each node, -1 if there is none
+        axis (np.ndarray): splitting axis of each node (0 -> x, 1 -> y)
+        root (integer): index of the root node
+        qx (float): x coordinate of the query point
+        qy (float): y coordinate of the query point
+        depth (integer): the maximum depth of the tree
+
+    Returns:
+        integer: the index of the closest node
+
+    '''
+    # The stack holds at most one skipped branch per level of the tree
+    stack = np.empty(depth + 1, dtype=np.int32)
+    stack_dist2 = np.empty(depth + 1, dtype=np.float64)
+    stack[0] = root
+    stack_dist2[0] = 0.0
+    top = 1
+    best = -1
+    best_dist2 = np.inf
+    while top > 0:
+        top -= 1
+        node = stack[top]
+        # The whole branch is further away than the best node found so far
+        if stack_dist2[top] >= best_dist2:
+            continue
+        while node != -1:
+            dx = xs[node] - qx
+            dy = ys[node] - qy
+            dist2 = dx*dx + dy*dy
+            if dist2 < best_dist2:
+                best = node
+                best_dist2 = dist2
+            # Go down the branch on the point's side of the splitting plane
+            plane = dx if axis[node] == 0 else dy
+            if plane > 0:
+                next_branch = left[node]
+                opposite_branch = right[node]
+            else:
+                next_branch = right[node]
+                opposite_branch = left[node]
+            if opposite_branch != -1:
+                stack[top] = opposite_branch
+                stack_dist2[top] = plane*plane
+                top += 1
+            node = next_branch
+    return best
@@ -0,0 +1,25 @@
+from src.discrete.bfs import BFS
+import numpy as np
+def test_bfs():
+    payload = {}
+    payload['obstacles'] = [{"shape":"rectangle", "definition":[20,10,40,20]},{"shape":"circle", "definition":[10,10,3]}, {"shape":"circle", "definition":[50,50,20]}]
+    payload['start'] = [0,0]
+    payload['goal'] = [90,25]
+    payload['goalRadius'] = 10
+    payload['step_size'] = 2
+    payload['width'] = 400
+    payload['height'] = 400
+    bfs = BFS(payload)
+    path = np.array(bfs.path)
+    # the path runs from a goal point back to the start in unit steps around obstacles
+    assert bfs.goal_grid[path[0][0], path[0][1]]
+    assert path[-1].tolist() == [0, 0]
+    assert np.all(np.abs(np.diff(path, axis=0)).sum(axis=1) == 1)
+    assert not np.any(bfs.blocked_grid[path[:, 0], path[:, 1]])
+    # a breadth first search finds a shortest path, which is a monotone one on this map
+    gx, gy = np.nonzero(bfs.goal_grid)
+    assert len(path) - 1 == np.min(gx + gy)
+    # every visited point's parent is a visited neighbour
+    for pt in bfs.points_list[1:]:
+        parent = bfs.points_list[pt['parentIndex']]
+        assert abs(pt['x'] - parent['x']) + abs(pt['y'] - parent['y']) == payload['step_size']
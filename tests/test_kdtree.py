@@ -0,0 +1,25 @@
+from src.utils.KDTree import KDTree
+from src.utils.NearestNeighborIndex import NearestNeighborIndex
+import numpy as np
+def test_nearest_neighbor():
+    rng = np.random.default_rng(0)
+    points = rng.uniform(0, 100, size=(200, 2))
+    queries = rng.uniform(0, 100, size=(50, 2))
+    tree = KDTree(points[0])
+    index = NearestNeighborIndex(points[0], leaf_size=4)
+    for point in points[1:]:
+        tree.Insert(point)
+        index.Insert(point)
+    for query in queries:
+        closest = np.argmin(np.sum((points - query)**2, axis=1))
+        assert np.array_equal(tree.NearestNeighbor(query).p, points[closest])
+        assert index.NearestNeighbor(query) == closest
+    closest = np.argmin(np.sum((points - queries[:, None, :])**2, axis=2), axis=1)
+    assert np.array_equal(index.NearestNeighbors(queries), closest)
+
+def test_node_equality():
+    tree = KDTree((11, 10))
+    a = tree.Insert((4, 7))
+    b = tree.Insert((4, 7))
+    assert a == b and a != tree.root
+    assert len({tree.root, a, b}) == 2
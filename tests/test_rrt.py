@@ -1,4 +1,4 @@
-from src.continuous.RRT import RRT
+from src.continuous.RRT import RRT, IsCollision, PrepareObstacles, Steer
 import numpy as np
 def test_rrt():
     payload = {}
@@ -10,4 +10,42 @@ def test_rrt():
     payload['width'] = 400
     payload['height'] = 400
     rrt = RRT(payload)
-    assert np.linalg.norm(rrt.Target_Node.p - payload['goal']) <= payload['goalRadius']
\ No newline at end of file
+    assert np.linalg.norm(rrt.Target_Node.p - payload['goal']) <= payload['goalRadius']
+
+def test_is_collision():
+    obstacles = PrepareObstacles([{"shape":"rectangle", "definition":[20,10,40,20]},
+                                  {"shape":"circle", "definition":[50,50,20]}], 0)
+    # crosses the rectangle, including axis-parallel and diagonal segments
+    assert IsCollision([50, 15], [10, 15], obstacles)
+    assert IsCollision([45, 25], [15, 5], obstacles)
+    # passes through the circle with both end points outside of it
+    assert IsCollision([50, 80], [50, 20], obstacles)
+    # clear of every obstacle
+    assert not IsCollision([100, 0], [0, 0], obstacles)
+    assert not IsCollision([10, 30], [10, 0], obstacles)
+    # a batch of segments is checked in one call
+    collisions = IsCollision([[50, 15], [100, 0], [50, 80]], [[10, 15], [0, 0], [50, 20]], obstacles)
+    assert collisions.tolist() == [True, False, True]
+
+def test_steer():
+    assert np.allclose(Steer([10, 0], [0, 0], 3), [3, 0])
+    # a batch of points is steered in one call, points within d_max are kept
+    x_new = Steer([[10, 0], [1, 1], [0, 0]], [[0, 0], [0, 0], [0, 0]], 3)
+    assert np.allclose(x_new, [[3, 0], [1, 1], [0, 0]])
+
+def test_rrt_seed():
+    payload = {}
+    payload['obstacles'] = [{"shape":"rectangle", "definition":[20,10,40,20]}]
+    payload['start'] = [0,0]
+    payload['goal'] = [90,25]
+    payload['goalRadius'] = 10
+    payload['d_max'] = 28
+    payload['width'] = 400
+    payload['height'] = 400
+    payload['seed'] = 7
+    assert RRT(payload).RRTPts == RRT(payload).RRTPts
+    del payload['seed']
+    np.random.seed(7)
+    pts = RRT(payload).RRTPts
+    np.random.seed(7)
+    assert RRT(payload).RRTPts == pts